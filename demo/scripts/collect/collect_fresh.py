@@ -116,11 +116,18 @@ SITE_URLS = {
 
 
 # ── Logging ───────────────────────────────────────────────────────────────────
+_log_fh = None   # LOG_FILE handle, opened on first log() and kept for the run
+
+
 def log(msg: str):
+    global _log_fh
     line = f"[{time.strftime('%H:%M:%S')}] {msg}"
     print(line)
-    with open(LOG_FILE, "a") as f:
-        f.write(line + "\n")
+    if _log_fh is None:
+        # Line-buffered: each message still reaches disk as it is logged,
+        # without reopening the file for every line
+        _log_fh = open(LOG_FILE, "a", buffering=1)
+    _log_fh.write(line + "\n")
 
 
 # ── Tor / browser helpers ─────────────────────────────────────────────────────
@@ -211,11 +218,18 @@ def load_existing_counts(output_csv: str) -> dict:
     if not os.path.exists(output_csv):
         return counts
     with open(output_csv, newline="") as f:
-        reader = csv.reader(f)
-        next(reader, None)  # skip header
-        for row in reader:
-            if row:
-                counts[row[0]] = counts.get(row[0], 0) + 1
+        next(f, None)  # skip header
+        for line in f:
+            line = line.rstrip("\r\n")
+            if not line:
+                continue
+            # Only the label column is needed: split it off rather than
+            # tokenizing every packet field. Quoted labels go through csv.
+            if line.startswith('"'):
+                label = next(csv.reader([line]))[0]
+            else:
+                label = line.partition(",")[0]
+            counts[label] = counts.get(label, 0) + 1
     return counts
 
 
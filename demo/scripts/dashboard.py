@@ -51,6 +51,8 @@ TOR_PORT      = 9050      # Tor daemon on Linux/WSL (9150 for Tor Browser)
 WINDOW_SIZE   = 750       # packets per feature window (matches training median ~736)
 POLL_INTERVAL = 0.5       # seconds between UI refresh
 SNIFF_IFACE   = "eth0"    # Tor circuit traffic exits on eth0 (matches training data)
+TREND_POINTS  = 300       # most recent samples drawn in the confidence chart
+LOG_LINES     = 20        # log lines kept in session state and shown in the log box
 
 _SCRIPTS_DIR       = os.path.dirname(os.path.abspath(__file__))
 _DEMO_DIR          = os.path.dirname(_SCRIPTS_DIR)
@@ -106,6 +108,8 @@ class FakeDataSource:
             lmap = json.load(f)
         self.labels = [lmap[str(i)] for i in range(len(lmap))]
         self._profiles = {site: self._make_profile(site) for site in self.labels}
+        self._label_index = {site: i for i, site in enumerate(self.labels)}
+        self._rng = np.random.default_rng()   # one generator, whole-window draws
         self.current_site = random.choice(self.labels)
         self._counter = 0
 
@@ -127,41 +131,42 @@ class FakeDataSource:
 
     def _generate_window(self):
         profile = self._profiles[self.current_site]
-        packets, t = [], time.time()
-        for _ in range(WINDOW_SIZE):
-            direction = "incoming" if random.random() < profile["incoming_bias"] else "outgoing"
-            size = max(40, min(1500, int(np.random.normal(profile["mean_size"], profile["std_size"]))))
-            iat  = max(0.1, np.random.exponential(10))
-            t   += iat / 1000.0
-            packets.append(PacketRecord(t, size, direction, iat))
-        return packets
+        rng     = self._rng
+        # Draw the whole window at once instead of three RNG calls per packet
+        incoming = rng.random(WINDOW_SIZE) < profile["incoming_bias"]
+        sizes    = np.clip(rng.normal(profile["mean_size"], profile["std_size"], WINDOW_SIZE)
+                           .astype(np.int64), 40, 1500)
+        iats     = np.maximum(rng.exponential(10, WINDOW_SIZE), 0.1)
+        # cumsum runs left to right, so this matches accumulating t += iat / 1000
+        times    = np.cumsum(np.concatenate(([time.time()], iats / 1000.0)))[1:]
+        return [
+            PacketRecord(t, size, "incoming" if inc else "outgoing", iat)
+            for t, size, inc, iat in zip(times.tolist(), sizes.tolist(),
+                                         incoming.tolist(), iats.tolist())
+        ]
 
     def _extract_features(self, packets):
-        sizes = [p.size for p in packets]
-        iats  = [p.inter_arrival for p in packets]
-        out   = [p for p in packets if p.direction == "outgoing"]
-        inc   = [p for p in packets if p.direction == "incoming"]
-        bursts = current = 1
-        max_b  = 1
-        for i in range(1, len(packets)):
-            if packets[i].inter_arrival < 50:
-                current += 1
-                max_b = max(max_b, current)
-            else:
-                bursts += 1
-                current = 1
-        ob, ib = sum(p.size for p in out), sum(p.size for p in inc)
-        tb = ob + ib
+        n      = len(packets)
+        sizes  = np.fromiter((p.size for p in packets), dtype=np.int64, count=n)
+        iats   = np.fromiter((p.inter_arrival for p in packets), dtype=np.float64, count=n)
+        is_out = np.fromiter((p.direction == "outgoing" for p in packets), dtype=bool, count=n)
+        n_out  = int(is_out.sum())
+        # A gap of >= 50 ms starts a new burst; burst sizes are the run
+        # lengths between those gaps (the first packet always opens one).
+        starts = np.flatnonzero(iats[1:] >= 50) + 1
+        runs   = np.diff(np.concatenate(([0], starts, [n])))
+        ob, tb = int(sizes[is_out].sum()), int(sizes.sum())
+        ib     = tb - ob
         return {
-            "total_packets": len(packets), "total_bytes": tb,
-            "outgoing_packets": len(out),  "incoming_packets": len(inc),
+            "total_packets": n,             "total_bytes": tb,
+            "outgoing_packets": n_out,      "incoming_packets": n - n_out,
             "outgoing_bytes": ob,           "incoming_bytes": ib,
             "mean_packet_size": float(np.mean(sizes)),
             "std_packet_size":  float(np.std(sizes)),
             "mean_inter_arrival_ms": float(np.mean(iats)),
             "std_inter_arrival_ms":  float(np.std(iats)),
-            "burst_count": bursts, "max_burst_size": max_b,
-            "outgoing_ratio": len(out) / len(packets) if packets else 0,
+            "burst_count": len(runs), "max_burst_size": max(1, int(runs.max())),
+            "outgoing_ratio": n_out / n if n else 0,
             "bytes_ratio":    ob / tb if tb else 0,
         }
 
@@ -169,20 +174,21 @@ class FakeDataSource:
         # Use the thread-safe Event — st.session_state is not accessible
         # from background worker threads (ScriptRunContext missing).
         defense = _defense_enabled.is_set()
+        n = len(self.labels)
         if defense:
             # Defense on: uniform low-confidence scores across all sites —
             # simulates the classifier being unable to fingerprint the traffic.
-            raw = {s: random.uniform(0.05, 0.25) for s in self.labels}
+            raw = self._rng.uniform(0.05, 0.25, n)
         else:
             # Defense off: simulate a well-trained classifier correctly
             # identifying the current site with high confidence.
             # Runner-up scores are kept very small so the current site
             # normalizes to ~65–80% even with 40 competing labels.
-            raw = {s: random.uniform(0.002, 0.008) for s in self.labels}
-            raw[self.current_site] = random.uniform(0.60, 0.85)
-        total = sum(max(v, 0.001) for v in raw.values())
-        probs = {s: max(v, 0.001) / total for s, v in raw.items()}
-        pred  = max(probs, key=probs.get)
+            raw = self._rng.uniform(0.002, 0.008, n)
+            raw[self._label_index[self.current_site]] = self._rng.uniform(0.60, 0.85)
+        raw   = np.maximum(raw, 0.001)
+        probs = dict(zip(self.labels, (raw / raw.sum()).tolist()))
+        pred  = self.labels[int(raw.argmax())]
         return pred, probs[pred], probs
 
     def get_next_result(self):
@@ -214,6 +220,12 @@ class RealDataSource:
             lmap = json.load(f)
         self.labels = [lmap[str(i)] for i in range(len(lmap))]
 
+        # Warm-up: the first predict_proba pays one-off costs (joblib worker
+        # start-up, lazy allocations). Take them here so the first live
+        # window's latency_ms reflects steady-state inference.
+        warmup = np.zeros((1, self.scaler.n_features_in_))
+        self.model.predict_proba(self.scaler.transform(warmup))
+
     def get_next_result(self):
         from scapy.all import AsyncSniffer
         from extract_features import extract_features
@@ -291,6 +303,11 @@ class CaptureWorker:
 
 
 # ── SESSION STATE ─────────────────────────────────────────────────────────────
+def _empty_trend() -> dict:
+    # Column lists feed pd.DataFrame directly — no per-row dict to transpose
+    return {"Prediction Conf": [], "GT Conf": []}
+
+
 def init_state():
     defaults = {
         "running":            False,
@@ -299,7 +316,7 @@ def init_state():
         "worker":             None,
         "logs":               ["[INIT] System ready. Select a mode and press Start."],
         "total_packets":      0,
-        "conf_trend":         [],   # list of {"Prediction Conf": float, "GT Conf": float|None}
+        "conf_trend":         _empty_trend(),   # column-wise: {"Prediction Conf": [...], "GT Conf": [...]}
         "correct_count":      0,
         "top3_correct_count": 0,
         "gt_conf_sum":        0.0,
@@ -373,7 +390,7 @@ stop_btn  = col_stop.button("⏹ Stop",  use_container_width=True)
 if start_btn and not st.session_state["running"]:
     src = st.session_state["data_source"]
     st.session_state["result_queue"]       = queue.Queue()
-    st.session_state["conf_trend"]         = []
+    st.session_state["conf_trend"]         = _empty_trend()
     st.session_state["correct_count"]      = 0
     st.session_state["top3_correct_count"] = 0
     st.session_state["gt_conf_sum"]        = 0.0
@@ -402,6 +419,7 @@ if stop_btn and st.session_state["running"]:
 
 # ── DRAIN QUEUE ───────────────────────────────────────────────────────────────
 latest_result: Optional[InferenceResult] = st.session_state["last_result"]
+log_lines: list = []   # inference-log JSON lines, appended to LOG_FILE in one write
 
 while not st.session_state["result_queue"].empty():
     item = st.session_state["result_queue"].get_nowait()
@@ -463,23 +481,27 @@ while not st.session_state["result_queue"].empty():
             "capture_s":        item.capture_s,
             "latency_ms":       item.latency_ms,
         }
-        try:
-            with open(LOG_FILE, "a") as _lf:
-                _lf.write(json.dumps(log_entry) + "\n")
-        except OSError:
-            pass  # non-fatal — dashboard keeps running if log write fails
+        log_lines.append(json.dumps(log_entry) + "\n")
     else:
         result_flag = ""
 
-    st.session_state["conf_trend"].append({
-        "Prediction Conf": item.confidence,
-        "GT Conf":         gt_conf,
-    })
+    st.session_state["conf_trend"]["Prediction Conf"].append(item.confidence)
+    st.session_state["conf_trend"]["GT Conf"].append(gt_conf)
     st.session_state["logs"].append(
         f"[{ts}]{dflag} → {item.prediction} ({item.confidence:.1%}){result_flag}"
         f" | pkts={item.packets_in_window}"
     )
 
+# Only the tail is ever rendered — don't carry the full history across reruns
+del st.session_state["logs"][:-LOG_LINES]
+
+if log_lines:
+    try:
+        with open(LOG_FILE, "a") as _lf:
+            _lf.write("".join(log_lines))
+    except OSError:
+        pass  # non-fatal — dashboard keeps running if log write fails
+
 
 # ── MAIN UI ───────────────────────────────────────────────────────────────────
 src_label = st.session_state["data_source"].upper()
@@ -525,8 +547,13 @@ v1, v2 = st.columns([2, 1])
 with v1:
     st.subheader("📈 Confidence Over Time")
     trend = st.session_state["conf_trend"]
-    if trend:
-        chart_df = pd.DataFrame(trend).rename_axis("Sample")
+    n_trend = len(trend["Prediction Conf"])
+    if n_trend:
+        # The whole chart is re-sent to the browser on every rerun, so draw a
+        # rolling window rather than a payload that grows for the whole session
+        start    = max(0, n_trend - TREND_POINTS)
+        chart_df = pd.DataFrame({col: vals[start:] for col, vals in trend.items()},
+                                index=pd.RangeIndex(start, n_trend, name="Sample"))
         # Drop GT Conf column if no ground truth was available this session
         if chart_df["GT Conf"].isna().all():
             chart_df = chart_df[["Prediction Conf"]]
@@ -538,10 +565,10 @@ with v2:
     st.subheader("🕵️ Classifier Probabilities")
     if latest_result:
         prob_df = (
-            pd.DataFrame({"Site": list(latest_result.probabilities.keys()),
-                          "Probability": list(latest_result.probabilities.values())})
-            .set_index("Site")
-            .sort_values("Probability", ascending=False)
+            pd.Series(latest_result.probabilities, name="Probability")
+            .rename_axis("Site")
+            .sort_values(ascending=False)
+            .to_frame()
         )
         st.bar_chart(prob_df)
     else:
@@ -559,7 +586,7 @@ if latest_result:
 # ── LOGS ─────────────────────────────────────────────────────────────────────
 st.subheader("📟 Real-Time Logs")
 st.markdown(
-    '<div class="log-box">' + "<br>".join(st.session_state["logs"][-20:]) + "</div>",
+    '<div class="log-box">' + "<br>".join(st.session_state["logs"][-LOG_LINES:]) + "</div>",
     unsafe_allow_html=True,
 )
 
@@ -16,11 +16,13 @@ Optional (better pcap perf):
 
 import os
 import time
+import socket
 import random
 import logging
 import hashlib
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, fields
 from typing import Optional
 
 import numpy as np
@@ -31,6 +33,12 @@ from sklearn.preprocessing import StandardScaler
 from sklearn.pipeline import Pipeline
 import joblib
 
+try:
+    import dpkt
+    HAS_DPKT = True
+except ImportError:
+    HAS_DPKT = False
+
 log = logging.getLogger("dataset_manager")
 logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
 
@@ -125,14 +133,28 @@ class PcapParser:
         if not self.path.exists():
             raise FileNotFoundError(f"pcap not found: {self.path}")
 
+    # Columns of the per-packet table; the first five form the flow 5-tuple
+    FLOW_KEY    = ["src_ip", "dst_ip", "src_port", "dst_port", "protocol"]
+    PACKET_COLS = FLOW_KEY + ["time", "size"]
+
     def extract_flows(self) -> list[FlowRecord]:
-        """Parse pcap and group packets into flows by 5-tuple."""
+        """Parse pcap and group packets into flows by 5-tuple.
+        Uses dpkt when installed; falls back to scapy for anything it can't read."""
         log.info("Reading pcap: %s", self.path)
+        rows = self._read_packets_dpkt() if HAS_DPKT else None
+        if rows is None:
+            rows = self._read_packets_scapy()
+
+        records = self._aggregate_flows(pd.DataFrame(rows, columns=self.PACKET_COLS))
+        log.info("Extracted %d flows from pcap", len(records))
+        return records
+
+    def _read_packets_scapy(self) -> list[tuple]:
+        """One row per TCP/UDP packet: flow key + timestamp + size."""
         packets = rdpcap(str(self.path))
         log.info("Loaded %d packets", len(packets))
 
-        # Group packets by flow key (src_ip, dst_ip, src_port, dst_port, proto)
-        flows: dict[tuple, list] = {}
+        rows = []
         for pkt in packets:
             if not pkt.haslayer(IP):
                 continue
@@ -140,44 +162,131 @@ class PcapParser:
             if not proto:
                 continue
             layer = pkt[TCP] if proto == "TCP" else pkt[UDP]
-            key = (pkt[IP].src, pkt[IP].dst, layer.sport, layer.dport, proto)
-            flows.setdefault(key, []).append(pkt)
+            rows.append((pkt[IP].src, pkt[IP].dst, layer.sport, layer.dport, proto,
+                         float(pkt.time), len(pkt)))
+        return rows
 
-        records = []
-        for (src_ip, dst_ip, sp, dp, proto), pkts in flows.items():
-            record = self._flow_to_record(src_ip, dst_ip, sp, dp, proto, pkts)
-            if record:
-                records.append(record)
-
-        log.info("Extracted %d flows from pcap", len(records))
-        return records
+    def _read_packets_dpkt(self) -> Optional[list[tuple]]:
+        """
+        Same rows as _read_packets_scapy(), decoded with dpkt — headers are
+        unpacked lazily from raw bytes instead of building scapy layer objects.
+        Returns None for pcapng or unsupported link types so the caller can
+        fall back to scapy.
+        """
+        with open(self.path, "rb") as f:
+            try:
+                reader = dpkt.pcap.Reader(f)
+            except ValueError:
+                return None   # not classic pcap (e.g. pcapng)
+
+            decoders = {
+                dpkt.pcap.DLT_EN10MB:    dpkt.ethernet.Ethernet,
+                dpkt.pcap.DLT_LINUX_SLL: dpkt.sll.SLL,
+                dpkt.pcap.DLT_RAW:       dpkt.ip.IP,
+                101:                     dpkt.ip.IP,   # LINKTYPE_RAW
+            }
+            decode = decoders.get(reader.datalink())
+            if decode is None:
+                return None
+
+            rows, n_packets = [], 0
+            for ts, buf in reader:
+                n_packets += 1
+                try:
+                    frame = decode(buf)
+                except dpkt.UnpackError:
+                    continue
+                ip = frame if isinstance(frame, dpkt.ip.IP) else frame.data
+                if not isinstance(ip, dpkt.ip.IP):
+                    continue
+                layer = ip.data
+                if isinstance(layer, dpkt.tcp.TCP):
+                    proto = "TCP"
+                elif isinstance(layer, dpkt.udp.UDP):
+                    proto = "UDP"
+                else:
+                    continue
+                rows.append((socket.inet_ntoa(ip.src), socket.inet_ntoa(ip.dst),
+                             layer.sport, layer.dport, proto, float(ts), len(buf)))
+
+        log.info("Loaded %d packets", n_packets)
+        return rows
+
+    @classmethod
+    def _aggregate_flows(cls, pkts: pd.DataFrame) -> list[FlowRecord]:
+        """
+        Collapse a per-packet table into one FlowRecord per 5-tuple.
 
-    def _flow_to_record(self, src_ip, dst_ip, sp, dp, proto, pkts) -> Optional[FlowRecord]:
-        if len(pkts) < 2:
-            return None
-
-        timestamps = sorted([float(p.time) for p in pkts])
-        sizes      = [len(p) for p in pkts]
-        iats_ms    = [(timestamps[i+1] - timestamps[i]) * 1000
-                      for i in range(len(timestamps) - 1)]
-        duration_ms = (timestamps[-1] - timestamps[0]) * 1000
-
-        return FlowRecord(
-            src_ip=src_ip, dst_ip=dst_ip,
-            src_port=sp, dst_port=dp, protocol=proto,
-            packet_count=len(pkts),
-            total_bytes=sum(sizes),
-            duration_ms=round(duration_ms, 3),
-            inter_arrival_mean=round(float(np.mean(iats_ms)), 3),
-            inter_arrival_std=round(float(np.std(iats_ms)), 3),
-            packet_size_mean=round(float(np.mean(sizes)), 3),
-            packet_size_std=round(float(np.std(sizes)), 3),
-            bytes_per_second=round(sum(sizes) / max(duration_ms / 1000, 0.001), 3),
+        All per-flow statistics come out of a single groupby pass instead of
+        a Python loop over each flow's packet list. Flows with fewer than
+        two packets are dropped (no inter-arrival time to measure).
+        """
+        if pkts.empty:
+            return []
+
+        pkts = pkts.sort_values("time", kind="stable")
+        pkts["iat_ms"] = pkts.groupby(cls.FLOW_KEY, sort=False)["time"].diff() * 1000
+        groups = pkts.groupby(cls.FLOW_KEY, sort=False)
+
+        flows = groups.agg(
+            packet_count=("size", "size"),
+            total_bytes=("size", "sum"),
+            t_first=("time", "min"),
+            t_last=("time", "max"),
+            inter_arrival_mean=("iat_ms", "mean"),
+            packet_size_mean=("size", "mean"),
         )
+        flows["inter_arrival_std"] = groups["iat_ms"].std(ddof=0)
+        flows["packet_size_std"]   = groups["size"].std(ddof=0)
+        flows = flows[flows["packet_count"] >= 2].reset_index()
+
+        flows["duration_ms"]      = (flows["t_last"] - flows["t_first"]) * 1000
+        flows["bytes_per_second"] = (flows["total_bytes"]
+                                     / np.maximum(flows["duration_ms"] / 1000, 0.001))
+
+        return [
+            FlowRecord(
+                src_ip=f.src_ip, dst_ip=f.dst_ip,
+                src_port=int(f.src_port), dst_port=int(f.dst_port), protocol=f.protocol,
+                packet_count=int(f.packet_count),
+                total_bytes=int(f.total_bytes),
+                duration_ms=round(float(f.duration_ms), 3),
+                inter_arrival_mean=round(float(f.inter_arrival_mean), 3),
+                inter_arrival_std=round(float(f.inter_arrival_std), 3),
+                packet_size_mean=round(float(f.packet_size_mean), 3),
+                packet_size_std=round(float(f.packet_size_std), 3),
+                bytes_per_second=round(float(f.bytes_per_second), 3),
+            )
+            for f in flows.itertuples(index=False)
+        ]
 
     @staticmethod
     def to_dataframe(flows: list[FlowRecord]) -> pd.DataFrame:
-        return pd.DataFrame([f.__dict__ for f in flows])
+        # Build column-major: one list per field rather than a dict per row
+        cols = [f.name for f in fields(FlowRecord)]
+        return pd.DataFrame({c: [getattr(f, c) for f in flows] for c in cols}, columns=cols)
+
+
+def find_pcaps(directory) -> list[Path]:
+    """
+    List the .pcap / .pcapng files in a directory, sorted by name.
+
+    One os.scandir() pass — the d_type from the directory read answers
+    is_file() without a per-entry stat, and both extensions are matched
+    in the same walk instead of one glob per pattern.
+    """
+    try:
+        with os.scandir(directory) as it:
+            return sorted(Path(e.path) for e in it
+                          if e.name.endswith((".pcap", ".pcapng"))
+                          and not e.name.startswith(".") and e.is_file())
+    except FileNotFoundError:
+        return []
+
+
+def _parse_pcap_file(path: str) -> list[FlowRecord]:
+    """Process-pool worker for DatasetManager.load_directory()."""
+    return PcapParser(path).extract_flows()
 
 
 # ---------------------------------------------------------------------------
@@ -209,7 +318,7 @@ def extract_features(df: pd.DataFrame) -> pd.DataFrame:
 
     # Flag well-known fingerprinting ports
     fp_ports = {80, 443, 8080, 8443}
-    df["is_fp_port"] = df["dst_port"].apply(lambda p: int(p in fp_ports))
+    df["is_fp_port"] = df["dst_port"].isin(fp_ports).astype(int)
 
     return df
 
@@ -386,16 +495,25 @@ class DatasetManager:
         self._rebuild_df()
         return self
 
-    def load_directory(self, directory: str = "data"):
-        """Load all .pcap / .pcapng files from a directory."""
-        d = Path(directory)
-        files = list(d.glob("*.pcap")) + list(d.glob("*.pcapng"))
+    def load_directory(self, directory: str = "data", workers: Optional[int] = None):
+        """
+        Load all .pcap / .pcapng files from a directory.
+
+        Each file is parsed independently, so files are fanned out across a
+        process pool (default: one worker per CPU). Flows are appended in
+        file order and the DataFrame is rebuilt once at the end.
+        """
+        files = find_pcaps(directory)
         if not files:
-            log.warning("No pcap files found in %s", d)
+            log.warning("No pcap files found in %s", directory)
             return self
-        for f in files:
-            log.info("Loading %s", f.name)
-            self.load_pcap(str(f))
+        workers = min(workers or os.cpu_count() or 1, len(files))
+        log.info("Loading %d pcap files with %d workers", len(files), workers)
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for f, flows in zip(files, pool.map(_parse_pcap_file, map(str, files))):
+                log.info("Loaded %s (%d flows)", f.name, len(flows))
+                self.flows.extend(flows)
+        self._rebuild_df()
         return self
 
     def _rebuild_df(self):
@@ -490,7 +608,7 @@ def get_proxy_delay(manager: DatasetManager) -> float:
 if __name__ == "__main__":
     dm = DatasetManager()
 
-    pcap_files = list(Path("data").glob("*.pcap")) + list(Path("data").glob("*.pcapng"))
+    pcap_files = find_pcaps("data")
 
     if pcap_files:
         dm.load_directory("data")
@@ -16,6 +16,7 @@ Usage (inside RealDataSource):
 """
 
 import socket
+from array import array
 from typing import List, Optional, Tuple
 
 import numpy as np
@@ -47,14 +48,25 @@ FEATURE_NAMES = [
 # Internal helpers
 # ---------------------------------------------------------------------------
 
+_LOCAL_IP: Optional[str] = None   # set by _get_local_ip() on the first successful probe
+
+
 def _get_local_ip() -> str:
-    """Return the local machine's primary IP address."""
-    try:
-        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
-            s.connect(("8.8.8.8", 80))
-            return s.getsockname()[0]
-    except OSError:
-        return "127.0.0.1"
+    """Return the local machine's primary IP address.
+
+    Probed once per process — packets_to_trace() runs on every capture
+    window and the route lookup would otherwise open a socket each time.
+    A failed probe (no route yet) is not remembered: it falls back to
+    127.0.0.1 for this call and is retried on the next one."""
+    global _LOCAL_IP
+    if _LOCAL_IP is None:
+        try:
+            with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
+                s.connect(("8.8.8.8", 80))
+                _LOCAL_IP = s.getsockname()[0]
+        except OSError:
+            return "127.0.0.1"
+    return _LOCAL_IP
 
 
 def packets_to_trace(
@@ -89,35 +101,34 @@ def packets_to_trace(
     if local_ip is None:
         local_ip = _get_local_ip()
 
-    trace = []
+    # Typed growable buffers: no boxed Python floats/bools per packet
+    sizes, outgoing = array("d"), array("b")
     for pkt in packets:
         if not pkt.haslayer("IP"):
             continue
-        size = float(len(pkt))
-        src  = pkt["IP"].src
-        dst  = pkt["IP"].dst
+        src = pkt["IP"].src
+        dst = pkt["IP"].dst
 
         # Loopback: src == dst == 127.x.x.x — use TCP port for direction
         if src.startswith("127.") and dst.startswith("127."):
-            if pkt.haslayer("TCP"):
-                trace.append(size if pkt["TCP"].dport == tor_port else -size)
-            else:
-                trace.append(-size)
-        elif src == local_ip:
-            trace.append(size)
+            outgoing.append(pkt.haslayer("TCP") and pkt["TCP"].dport == tor_port)
         else:
-            trace.append(-size)
+            outgoing.append(src == local_ip)
+        sizes.append(len(pkt))
 
-    return np.array(trace, dtype=np.float64)
+    # Apply the direction sign to the whole window in one vectorized pass
+    sizes = np.frombuffer(sizes, dtype=np.float64)
+    return np.where(np.frombuffer(outgoing, dtype=np.int8).astype(bool), sizes, -sizes)
 
 
-def _cumul_interpolate(trace: np.ndarray, n_points: int = 100) -> list:
+def _cumul_interpolate(trace: np.ndarray, n_points: int = 100, cumsum=None) -> list:
     """Interpolate normalized cumulative sum of signed trace to n_points positions.
     CUMUL representation (Panchenko et al., 2016).
     Normalized by total bytes so the output is capture-length invariant."""
     if len(trace) == 0:
         return [0.0] * n_points
-    cumsum      = np.cumsum(trace)
+    if cumsum is None:
+        cumsum = np.cumsum(trace)
     total_bytes = float(np.sum(np.abs(trace)))
     if total_bytes > 0:
         cumsum = cumsum / total_bytes   # scale to [-1, 1] range
@@ -126,6 +137,15 @@ def _cumul_interpolate(trace: np.ndarray, n_points: int = 100) -> list:
     return np.interp(x_new, x_orig, cumsum).tolist()
 
 
+def _signed_bursts(trace: np.ndarray) -> np.ndarray:
+    """Run-length encode packet directions into signed burst lengths
+    (+n = n consecutive outgoing, -n = n consecutive incoming).
+    Mirrors evaluate_models.signed_bursts()."""
+    signs  = np.sign(trace)
+    bounds = np.concatenate(([0], np.flatnonzero(signs[1:] != signs[:-1]) + 1, [len(signs)]))
+    return np.diff(bounds) * signs[bounds[:-1]]
+
+
 def _extract_wf_features(trace: np.ndarray) -> list:
     """
     Extract the 113-feature vector used by the Random Forest model.
@@ -140,7 +160,8 @@ def _extract_wf_features(trace: np.ndarray) -> list:
     Returns:
         List of 113 floats.
     """
-    non_zero = trace[trace != 0]
+    # Traces may be stored as float32; compute features in float64
+    non_zero = np.asarray(trace[trace != 0], dtype=np.float64)
     if non_zero.size == 0:
         return [0.0] * 113
 
@@ -155,30 +176,21 @@ def _extract_wf_features(trace: np.ndarray) -> list:
     size_ratio = (float(np.sum(out_pkts)) / float(abs(np.sum(in_pkts)))
                   if in_count > 0 else 0.0)
 
+    abs_sizes = np.abs(non_zero)
     # Bin fractions (normalize by total_count — capture-length invariant)
     bins = [
-        float(np.sum(np.abs(non_zero) < 100))   / total_count,
-        float(np.sum((np.abs(non_zero) >= 100) & (np.abs(non_zero) < 1000))) / total_count,
-        float(np.sum(np.abs(non_zero) >= 1000)) / total_count,
+        float(np.sum(abs_sizes < 100))   / total_count,
+        float(np.sum((abs_sizes >= 100) & (abs_sizes < 1000))) / total_count,
+        float(np.sum(abs_sizes >= 1000)) / total_count,
     ]
 
     # Burst detection
-    signs = np.sign(non_zero)
-    bursts: list = []
-    curr_sign = signs[0]
-    curr_len  = 0
-    for s in signs:
-        if s == curr_sign:
-            curr_len += 1
-        else:
-            bursts.append(int(curr_len * curr_sign))
-            curr_sign, curr_len = s, 1
-    bursts.append(int(curr_len * curr_sign))
-
-    avg_out_burst = (float(np.mean([b for b in bursts if b > 0]))
-                     if any(b > 0 for b in bursts) else 0.0)
-    avg_in_burst  = (float(np.mean([abs(b) for b in bursts if b < 0]))
-                     if any(b < 0 for b in bursts) else 0.0)
+    bursts  = _signed_bursts(non_zero)
+    out_b   = bursts[bursts > 0]
+    in_b    = -bursts[bursts < 0]
+
+    avg_out_burst = float(np.mean(out_b)) if out_b.size else 0.0
+    avg_in_burst  = float(np.mean(in_b)) if in_b.size else 0.0
     max_burst     = float(np.max(np.abs(bursts)))
     burst_density = float(len(bursts)) / total_count  # bursts per packet
 
@@ -190,7 +202,7 @@ def _extract_wf_features(trace: np.ndarray) -> list:
         float(np.mean(cumsum)) / total_count,
         float(np.std(cumsum))  / total_count,
     ]
-    cumul = _cumul_interpolate(non_zero, 100)
+    cumul = _cumul_interpolate(non_zero, 100, cumsum)
 
     return [
         out_ratio, size_ratio,
@@ -238,7 +250,8 @@ def _extract_display_features(packets, trace: np.ndarray) -> dict:
     total_count  = float(len(non_zero))
     out_count    = float(len(out_pkts))
     in_count     = float(len(in_pkts))
-    total_bytes  = float(np.sum(np.abs(non_zero)))
+    abs_sizes    = np.abs(non_zero)
+    total_bytes  = float(np.sum(abs_sizes))
     out_bytes    = float(np.sum(out_pkts))
     in_bytes     = float(abs(np.sum(in_pkts)))
     out_ratio    = out_count / total_count if total_count > 0 else 0.0
@@ -247,28 +260,18 @@ def _extract_display_features(packets, trace: np.ndarray) -> dict:
     # Inter-arrival times from packet timestamps (milliseconds)
     mean_iat = 0.0
     std_iat  = 0.0
-    timestamps = []
-    for pkt in packets:
-        if hasattr(pkt, "time"):
-            timestamps.append(float(pkt.time))
-    if len(timestamps) >= 2:
+    timestamps = np.fromiter(
+        (float(pkt.time) for pkt in packets if hasattr(pkt, "time")), dtype=np.float64
+    )
+    if timestamps.size >= 2:
         timestamps.sort()
-        iats = np.diff(timestamps) * 1000.0  # seconds → ms
+        iats = np.diff(timestamps)
+        iats *= 1000.0  # seconds → ms, in place
         mean_iat = float(np.mean(iats))
         std_iat  = float(np.std(iats))
 
     # Burst stats (reuse same logic as _extract_wf_features)
-    signs = np.sign(non_zero)
-    bursts: list = []
-    curr_sign = signs[0]
-    curr_len  = 0
-    for s in signs:
-        if s == curr_sign:
-            curr_len += 1
-        else:
-            bursts.append(int(curr_len * curr_sign))
-            curr_sign, curr_len = s, 1
-    bursts.append(int(curr_len * curr_sign))
+    bursts = _signed_bursts(non_zero)
 
     burst_count   = float(len(bursts))
     max_burst_size = float(np.max(np.abs(bursts)))
@@ -280,8 +283,8 @@ def _extract_display_features(packets, trace: np.ndarray) -> dict:
         "incoming_packets":      in_count,
         "outgoing_bytes":        out_bytes,
         "incoming_bytes":        in_bytes,
-        "mean_packet_size":      float(np.mean(np.abs(non_zero))),
-        "std_packet_size":       float(np.std(np.abs(non_zero))),
+        "mean_packet_size":      float(np.mean(abs_sizes)),
+        "std_packet_size":       float(np.std(abs_sizes)),
         "mean_inter_arrival_ms": mean_iat,
         "std_inter_arrival_ms":  std_iat,
         "burst_count":           burst_count,
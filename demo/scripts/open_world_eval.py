@@ -32,6 +32,7 @@ Options:
     --trees N          RF estimators (default: 1000)
     --test-size F      Held-out fraction per class (default: 0.2)
     --output PATH      Write CSV tradeoff table to this path (optional)
+    --no-cache         Re-extract features instead of reusing demo/.cache/
 """
 
 import argparse
@@ -46,7 +47,7 @@ from sklearn.preprocessing import LabelEncoder, StandardScaler
 
 _HERE = os.path.dirname(os.path.abspath(__file__))
 sys.path.insert(0, _HERE)
-from evaluate_models import find_dataset, load_dataset, load_npz_dataset
+from evaluate_models import find_dataset, load_features
 
 
 def main():
@@ -62,15 +63,14 @@ def main():
     parser.add_argument("--trees", type=int, default=1000, metavar="N")
     parser.add_argument("--test-size", type=float, default=0.2, metavar="F")
     parser.add_argument("--output", default=None, metavar="PATH")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Re-extract features instead of reusing demo/.cache/.")
     args = parser.parse_args()
 
     target = find_dataset(args.dataset)
     print(f"[*] Dataset: {target}")
 
-    if target.endswith(".npz"):
-        X, y_raw = load_npz_dataset(target)
-    else:
-        X, y_raw = load_dataset(target)
+    X, y_raw = load_features(target, use_cache=not args.no_cache)
 
     if len(X) == 0:
         print("[!] No samples loaded.")
@@ -80,8 +80,8 @@ def main():
     all_sites = sorted(np.unique(y_raw))
     n_total   = len(all_sites)
     n_mon     = min(args.monitored, n_total - 1)   # need at least 1 unmonitored site
-    monitored_sites   = set(all_sites[:n_mon])
-    unmonitored_sites = set(all_sites[n_mon:])
+    monitored_sites   = all_sites[:n_mon]
+    unmonitored_sites = all_sites[n_mon:]
 
     print(f"[*] {n_total} total sites → {n_mon} monitored, "
           f"{len(unmonitored_sites)} unmonitored")
@@ -89,7 +89,7 @@ def main():
     # Partition samples
     X_np   = np.array(X, dtype=np.float64)
     y_np   = np.array(y_raw)
-    mon_mask = np.array([s in monitored_sites for s in y_np])
+    mon_mask = np.isin(y_np, monitored_sites)
 
     X_mon, y_mon = X_np[mon_mask], y_np[mon_mask]
     X_unm         = X_np[~mon_mask]          # no labels needed for unmonitored
@@ -114,13 +114,18 @@ def main():
     model = RandomForestClassifier(n_estimators=args.trees, n_jobs=-1, random_state=42)
     model.fit(X_tr, y_tr)
 
+    # One forest pass per test set. RandomForest.predict() is the argmax of
+    # predict_proba(), so predictions come from the same probabilities.
+    probs_mon = model.predict_proba(X_te_mon)
+    probs_unm = model.predict_proba(X_te_unm)
+    pred_mon  = model.classes_[probs_mon.argmax(axis=1)]
+    correct_mon = pred_mon == y_te_mon
+
     # Closed-world accuracy (monitored test set, no threshold)
-    cw_acc = accuracy_score(y_te_mon, model.predict(X_te_mon))
+    cw_acc = accuracy_score(y_te_mon, pred_mon)
     print(f"\n[*] Closed-world accuracy (monitored only): {cw_acc:.2%}")
 
     # Get max confidence for each sample — this is the "decision confidence"
-    probs_mon = model.predict_proba(X_te_mon)
-    probs_unm = model.predict_proba(X_te_unm)
     conf_mon  = probs_mon.max(axis=1)
     conf_unm  = probs_unm.max(axis=1)
 
@@ -138,7 +143,6 @@ def main():
     rows = []
     for thresh in thresholds:
         # TPR: monitored samples above threshold with correct prediction
-        correct_mon = model.predict(X_te_mon) == y_te_mon
         tp = np.sum((conf_mon >= thresh) & correct_mon)
         tpr = tp / len(y_te_mon) if len(y_te_mon) > 0 else 0.0
 
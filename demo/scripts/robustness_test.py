@@ -33,6 +33,7 @@ Options:
     --test-size F          Hold-out fraction (default: 0.2)
     --output PATH          Write CSV results to this path (optional)
     --seed N               Random seed (default: 42)
+    --workers N            Processes for feature extraction (default: all CPUs)
 """
 
 import argparse
@@ -49,7 +50,7 @@ from sklearn.preprocessing import LabelEncoder, StandardScaler
 
 _HERE = os.path.dirname(os.path.abspath(__file__))
 sys.path.insert(0, _HERE)
-from evaluate_models import find_dataset, extract_wf_features
+from evaluate_models import find_dataset, featurize_traces
 from time_to_decision import load_raw_traces
 
 
@@ -92,6 +93,8 @@ def main():
     parser.add_argument("--test-size", type=float, default=0.2, metavar="F")
     parser.add_argument("--output", default=None, metavar="PATH")
     parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--workers", type=int, default=None, metavar="N",
+                        help="Processes for feature extraction (default: all CPUs).")
     args = parser.parse_args()
 
     contamination_levels = [int(c.strip()) / 100.0
@@ -114,8 +117,8 @@ def main():
     encoder = LabelEncoder()
     y = encoder.fit_transform(y_raw)
 
-    # Train on full features
-    X_full = np.array([extract_wf_features(t) for t in raw_traces], dtype=np.float64)
+    # Split on indices and featurize only the training rows — test traces
+    # are re-featurized after mixing, so their clean features are never used
     idx_tr, idx_te = train_test_split(
         np.arange(len(raw_traces)), test_size=args.test_size,
         random_state=args.seed, stratify=y,
@@ -123,7 +126,7 @@ def main():
     y_tr, y_te = y[idx_tr], y[idx_te]
 
     scaler = StandardScaler()
-    X_tr   = scaler.fit_transform(X_full[idx_tr])
+    X_tr   = scaler.fit_transform(featurize_traces([raw_traces[i] for i in idx_tr], args.workers))
 
     print(f"[*] Training RF ({args.trees} trees) on {len(idx_tr)} samples...")
     model = RandomForestClassifier(n_estimators=args.trees, n_jobs=-1, random_state=args.seed)
@@ -134,6 +137,8 @@ def main():
     class_pool  = defaultdict(list)
     for i, (trace, label) in enumerate(zip(test_traces, y_te)):
         class_pool[label].append((i, trace))
+    # Contaminant candidates per class, built once rather than per test pair
+    other_classes = {c: [o for o in class_pool if o != c] for c in class_pool}
 
     all_labels = np.arange(len(encoder.classes_))
     rng        = random.Random(args.seed)
@@ -144,9 +149,8 @@ def main():
 
     results = []
     for level in contamination_levels:
-        y_pred_list  = []
+        merged_list  = []
         y_true_list  = []
-        probs_list   = []
         pairs_done   = 0
 
         for i, (trace_a, label_a) in enumerate(zip(test_traces, y_te)):
@@ -154,29 +158,24 @@ def main():
                 break
 
             # Pick a contaminant from a *different* class
-            other_classes = [c for c in class_pool if c != label_a]
-            if not other_classes:
+            candidates = other_classes[label_a]
+            if not candidates:
                 continue
-            contam_class = rng.choice(other_classes)
+            contam_class = rng.choice(candidates)
             _, trace_b   = rng.choice(class_pool[contam_class])
 
-            merged   = interleave(trace_a, trace_b, level, rng)
-            feat_vec = extract_wf_features(merged)
-            X_scaled = scaler.transform([feat_vec])
-            prob_vec = model.predict_proba(X_scaled)[0]
-            pred     = np.argmax(prob_vec)
-
-            y_pred_list.append(pred)
+            merged_list.append(interleave(trace_a, trace_b, level, rng))
             y_true_list.append(label_a)
-            probs_list.append(prob_vec)
             pairs_done += 1
 
-        if not y_pred_list:
+        if not merged_list:
             continue
 
-        y_pred_arr  = np.array(y_pred_list)
+        # Featurize the level's merged traces in one batch (process pool)
+        # and score them with a single forest pass
+        probs_arr   = model.predict_proba(scaler.transform(featurize_traces(merged_list, args.workers)))
+        y_pred_arr  = np.argmax(probs_arr, axis=1)
         y_true_arr  = np.array(y_true_list)
-        probs_arr   = np.array(probs_list)
 
         acc1 = accuracy_score(y_true_arr, y_pred_arr)
         acc3 = top_k_accuracy_score(y_true_arr, probs_arr, k=3, labels=all_labels)
@@ -21,6 +21,7 @@ Options:
     --trees N          RF estimators (default: 1000)
     --test-size F      Hold-out fraction (default: 0.2)
     --output PATH      Write CSV results to this path (default: print only)
+    --workers N        Processes for feature extraction (default: all CPUs)
 """
 
 import argparse
@@ -36,44 +37,29 @@ from sklearn.preprocessing import LabelEncoder, StandardScaler
 # Reuse feature code from the same scripts/ directory
 _HERE = os.path.dirname(os.path.abspath(__file__))
 sys.path.insert(0, _HERE)
-from evaluate_models import find_dataset, load_dataset, load_npz_dataset, extract_wf_features
+from evaluate_models import (
+    find_dataset, load_dataset, load_npz_dataset, load_trace_table, featurize_traces,
+)
 
 DEFAULT_WINDOWS = [25, 50, 75, 100, 150, 200, 300, 400, 500, 600, 750, 1000]
 
 
-def truncate_and_refeature(raw_traces: list, n_packets: int) -> np.ndarray:
+def truncate_and_refeature(raw_traces: list, n_packets: int, workers=None) -> np.ndarray:
     """Extract features from the first n_packets packets of each raw trace."""
-    X = []
-    for trace in raw_traces:
-        trunc = trace[:n_packets]
-        X.append(extract_wf_features(trunc))
-    return np.array(X, dtype=np.float64)
+    return featurize_traces([trace[:n_packets] for trace in raw_traces], workers)
 
 
 def load_raw_traces(csv_path: str):
-    """Load raw signed traces (not yet featurised) from a CSV dataset."""
+    """Load raw signed traces (not yet featurised) from a CSV or Parquet dataset."""
     if not os.path.exists(csv_path) or os.path.getsize(csv_path) == 0:
         return [], []
 
     raw_traces, labels = [], []
-    with open(csv_path, "r", newline="") as f:
-        reader = csv.reader(f)
-        next(reader, None)
-        for row in reader:
-            if not row or len(row) < 5:
-                continue
-            label = row[0].strip()
-            try:
-                trace = np.array(
-                    [float(v) if (v and v.strip()) else 0 for v in row[1:]],
-                    dtype=np.float64,
-                )
-                trace = trace[trace != 0]
-                if trace.size > 0:
-                    raw_traces.append(trace)
-                    labels.append(label)
-            except ValueError:
-                continue
+    for label, trace in zip(*load_trace_table(csv_path)):
+        trace = trace[trace != 0]
+        if trace.size > 0:
+            raw_traces.append(trace)
+            labels.append(label)
 
     return raw_traces, np.array(labels)
 
@@ -92,6 +78,8 @@ def main():
     parser.add_argument("--test-size", type=float, default=0.2, metavar="F")
     parser.add_argument("--output", default=None, metavar="PATH",
                         help="Write CSV results table to this path.")
+    parser.add_argument("--workers", type=int, default=None, metavar="N",
+                        help="Processes for feature extraction (default: all CPUs).")
     args = parser.parse_args()
 
     windows = (
@@ -103,7 +91,7 @@ def main():
     print(f"[*] Dataset: {target}")
 
     if target.endswith(".npz"):
-        X_full, y_raw = load_npz_dataset(target)
+        X_full, y_raw = load_npz_dataset(target, workers=args.workers)
         # For NPZ we don't have raw traces; featurise once and note limitation
         print("[!] NPZ format: truncation not available — evaluating full traces only.")
         encoder = LabelEncoder()
@@ -130,7 +118,7 @@ def main():
     y = encoder.fit_transform(y_raw)
 
     # Train on full-length features so the model sees the richest signal
-    X_full = np.array([extract_wf_features(t) for t in raw_traces], dtype=np.float64)
+    X_full = featurize_traces(raw_traces, args.workers)
     idx_tr, idx_te = train_test_split(
         np.arange(len(raw_traces)), test_size=args.test_size,
         random_state=42, stratify=y,
@@ -154,7 +142,7 @@ def main():
 
     results = []
     for n in windows:
-        X_te_n = truncate_and_refeature(test_traces, n)
+        X_te_n = truncate_and_refeature(test_traces, n, args.workers)
         X_te_n = scaler.transform(X_te_n)
         y_pred  = model.predict(X_te_n)
         probs   = model.predict_proba(X_te_n)